@@ -1,6 +1,8 @@
 """Automated install of NGINX Controller on Azure"""
 
+import package_bundle
 import provisioners
+import readiness
 import scripts
 
 import pulumi
@@ -38,6 +40,16 @@ admin_last_name = config.require('admin_last_name')
 controller_archive_path = config.require('controller_archive_path')
 # Disk space in gigabytes for the data partition on the Controller VM
 data_disk_size_gb = config.get_int('data_disk_size') or 130
+# Install the Controller VM platform packages from a locally built bundle instead of the package mirrors
+offline_packages = config.get_bool('offline_packages') or False
+# Path to the list of platform packages to install on the Controller VM
+platform_packages_list = config.get('platform_packages_list') or 'platform-packages.list'
+# Path to the lockfile of platform package versions that the offline package bundle was built from
+platform_packages_lockfile = config.get('platform_packages_lockfile') or 'platform-packages.lock'
+# Number of seconds to wait after installation for Controller endpoints to serve traffic
+readiness_timeout = config.get_int('readiness_timeout') or 900
+# Endpoints probed to confirm that Controller is serving traffic (defaults to the API, database and agent endpoints)
+readiness_probes = config.get_object('readiness_probes')
 # Email server settings
 smtp_host = config.require('smtp_host')
 smtp_port = config.require_int('smtp_port')
@@ -227,9 +239,16 @@ network_interface = network.NetworkInterface(resource_name='nic-nc',
 # Build NGINX Controller VM
 
 controller_fqdn = Output.all(public_ip.dns_settings).apply(lambda lst: lst[0])
+# The bundle is built ahead of time on the host by running package_bundle.py. Its digest
+# is not part of the custom data, because changing the custom data replaces the VM.
+platform_bundle = None
+if offline_packages:
+    platform_bundle = package_bundle.find_bundle(platform_packages_lockfile, 'package-bundles')
 custom_data = scripts.platform_setup_script({
     'TLS_HOSTNAME': scripts.build_vm_domain(config),
-    'LETS_ENCRYPT_EMAIL': admin_email
+    'LETS_ENCRYPT_EMAIL': admin_email,
+    'PLATFORM_PACKAGES': ' '.join(package_bundle.read_package_list(platform_packages_list)),
+    'OFFLINE_PACKAGES': 'true' if offline_packages else 'false'
 })
 
 controller_app_disk = compute.Disk(
@@ -351,15 +370,37 @@ if db is None:
 else:
     resource_dependencies = [public_ip, db, vm]
 
+if platform_bundle is not None:
+    # The platform setup script waits for this bundle before installing packages, so
+    # it is copied as soon as the VM is available rather than waiting on the database.
+    cp_platform_packages = provisioners.CopyFile(
+        name='copy-platform-packages',
+        conn=conn,
+        src=platform_bundle.path,
+        dest='/tmp/platform-packages.tar.gz',
+        opts=pulumi.ResourceOptions(depends_on=[public_ip, vm])
+    )
+    # The setup script waits for this checksum file, so it must only be copied after the bundle
+    cp_platform_packages_sha256 = provisioners.CopyString(
+        name='copy-platform-packages-sha256',
+        conn=conn,
+        content='{0}  /tmp/platform-packages.tar.gz\n'.format(platform_bundle.sha256),
+        dest='/tmp/platform-packages.tar.gz.sha256',
+        opts=pulumi.ResourceOptions(depends_on=[cp_platform_packages])
+    )
+
 copy_resources = ComponentResource(
     name='copy-controller-installer',
     t='remote:scp:CopyControllerInstallAssets',
     props={
+        # The installer archive is extracted as it is transferred, so it is never written to the VM's disk
         'cp_install_archive': provisioners.CopyFile(
             name='copy-controller-installer-archive'.format(installation_id),
             conn=conn,
             src=controller_archive_path,
-            dest='/tmp/controller-installer.tar.gz',
+            dest='/tmp/controller-installer',
+            extract=True,
+            strip_components=1,
             opts=pulumi.ResourceOptions(depends_on=resource_dependencies)
         ),
         'cp_secrets': provisioners.CopyString(
@@ -390,6 +431,13 @@ run_installer = provisioners.RemoteExec(
     opts=pulumi.ResourceOptions(depends_on=[copy_resources])
 )
 
+readiness_gate = provisioners.ReadinessGate(
+    name='controller-readiness-gate',
+    probes=readiness_probes or readiness.default_probes(scripts.build_vm_domain(config)),
+    timeout=readiness_timeout,
+    opts=pulumi.ResourceOptions(depends_on=[run_installer])
+)
+
 combined_output = Output.all(public_ip.name, public_ip.ip_address)
 
 if db is not None:
@@ -399,3 +447,5 @@ if db is not None:
 
 pulumi.export('nginx_controller_host', controller_fqdn)
 pulumi.export('nginx_controller_host_username', controller_host_username)
+pulumi.export('nginx_controller_time_to_ready', readiness_gate.time_to_ready)
+pulumi.export('nginx_controller_probe_latency_ms', readiness_gate.latency_ms)
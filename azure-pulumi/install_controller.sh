@@ -53,8 +53,13 @@ fi
 # them to be able to be read by the Controller installer. This path
 # is deleted which this script exits.
 LOCAL_CERT_DIR="$(mktemp -t --directory "letsencrypt_certs-XXXXXX")"
-# Path to extract installer to
-EXTRACT_DIR="$(mktemp -t --directory "nginx-controller-install-XXXXXX")"
+# Path to extract installer to. If the installer archive was streamed and extracted
+# during the copy, then we use the directory it was extracted to.
+if [ -f /tmp/controller-installer/install.sh ]; then
+  EXTRACT_DIR="/tmp/controller-installer"
+else
+  EXTRACT_DIR="$(mktemp -t --directory "nginx-controller-install-XXXXXX")"
+fi
 
 finish() {
   result=$?
@@ -132,9 +137,11 @@ if ! grep --quiet 'deploy-hook' /etc/letsencrypt/cli.ini; then
   printf "\ndeploy-hook = /usr/local/bin/update_controller_certs" | sudo tee --append /etc/letsencrypt/cli.ini > /dev/null
 fi
 
-echo 'Extracting NGINX Controller installer'
-tar --extract --gunzip --directory="${EXTRACT_DIR}" --strip-components=1 \
-  --file "/tmp/controller-installer.tar.gz"
+if [ ! -f "${EXTRACT_DIR}/install.sh" ]; then
+  echo 'Extracting NGINX Controller installer'
+  tar --extract --gunzip --directory="${EXTRACT_DIR}" --strip-components=1 \
+    --file "/tmp/controller-installer.tar.gz"
+fi
 
 echo 'Installing base prerequisites'
 "${EXTRACT_DIR}/helper.sh" prereqs base
@@ -0,0 +1,243 @@
+"""
+Builds the offline bundle of platform packages installed on the Controller VM.
+
+Run this on the host (not from within the project's Docker image) before running Pulumi:
+
+    python3 package_bundle.py            # build the bundle for the versions in platform-packages.lock
+    python3 package_bundle.py --update   # resolve the latest versions, rewrite the lockfile and build
+"""
+
+import argparse
+import hashlib
+import os
+import re
+import subprocess
+import sys
+import tempfile
+from typing import List, NamedTuple, Optional, Tuple
+
+# Docker image used to resolve and download the packages in the bundle. This must
+# match the OS image used for the Controller VM, so that the downloaded .deb files
+# are compatible with it. The image is pinned by digest in the lockfile.
+BUNDLE_BASE_IMAGE = 'ubuntu:18.04'
+
+LOCKFILE_HEADER = """# Generated by package_bundle.py - do not edit.
+# Run 'python3 package_bundle.py --update' to update the locked package versions.
+"""
+
+# Script run within a container to resolve the versions of the requested packages
+# and all of their dependencies that are not already installed in the image. apt
+# prints packages that are upgraded as 'Inst name [old] (new ...)' and packages
+# that are newly installed as 'Inst name (new ...)'.
+RESOLVE_SCRIPT = """set -o errexit
+set -o pipefail
+export DEBIAN_FRONTEND=noninteractive
+apt-get update -qq
+apt-get install --simulate -y {packages} | sed -n 's/^Inst \\([^ ]*\\) \\(\\[[^]]*\\] \\)\\?(\\([^ ]*\\) .*/\\1=\\3/p'
+"""
+
+# Script run within a container to download the locked packages and write a flat apt
+# repository index, so that the bundle can be used as a local package source on the
+# Controller VM. The archive is created with fixed timestamps and ownership so that
+# the same lockfile always produces the same archive. The name and version of each
+# downloaded package is printed so that it can be checked against the lockfile.
+BUILD_SCRIPT = """set -o errexit
+set -o pipefail
+export DEBIAN_FRONTEND=noninteractive
+apt-get update -qq
+apt-get install -qq -y apt-utils > /dev/null
+apt-get clean
+apt-get install -qq -y --download-only {packages}
+mkdir /tmp/platform-packages
+cp /var/cache/apt/archives/*.deb /tmp/platform-packages/
+cd /tmp/platform-packages
+dpkg-deb --show --showformat='deb: ${{Package}}=${{Version}}\\n' ./*.deb
+apt-ftparchive packages . > Packages
+gzip --keep --no-name Packages
+tar --create --sort=name --mtime=@0 --owner=0 --group=0 --numeric-owner . | gzip --no-name > /bundle/{archive}
+chown {uid}:{gid} /bundle/{archive}
+"""
+
+
+# PackageBundle describes an archive of .deb packages built from a lockfile.
+class PackageBundle(NamedTuple):
+    path: str
+    """Path to the bundle archive on the local file system."""
+    sha256: str
+    """The SHA-256 digest of the bundle archive."""
+    key: str
+    """The SHA-256 digest of the lockfile contents that the bundle was built from."""
+
+
+def read_package_list(package_list_path: str) -> List[str]:
+    """Reads the names of the requested packages from a package list file."""
+    packages = []
+    with open(package_list_path, 'r') as file:
+        for line in file.readlines():
+            package = line.split('#', 1)[0].strip()
+            if package:
+                packages.append(package)
+
+    if not packages:
+        raise ValueError('no packages defined in package list: {0}'.format(package_list_path))
+
+    return packages
+
+
+def read_lockfile(lockfile_path: str) -> Tuple[str, List[str]]:
+    """Reads the pinned image and the pinned package versions (name=version) from a lockfile."""
+    image = None
+    packages = []
+    with open(lockfile_path, 'r') as file:
+        for line in file.readlines():
+            entry = line.split('#', 1)[0].strip()
+            if entry.startswith('image:'):
+                image = entry[len('image:'):].strip()
+            elif entry:
+                if '=' not in entry:
+                    raise ValueError('package version not pinned in lockfile {0}: {1}'.format(lockfile_path, entry))
+                packages.append(entry)
+
+    if not image:
+        raise ValueError('no image defined in lockfile: {0}'.format(lockfile_path))
+    if not packages:
+        raise ValueError('no packages defined in lockfile: {0}'.format(lockfile_path))
+
+    return image, packages
+
+
+def write_lockfile(lockfile_path: str, image: str, packages: List[str]):
+    with open(lockfile_path, 'w') as file:
+        file.write(LOCKFILE_HEADER)
+        file.write('image: {0}\n'.format(image))
+        for package in sorted(packages):
+            file.write('{0}\n'.format(package))
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def bundle_path(lockfile_path: str, cache_dir: str) -> Tuple[str, str]:
+    """Returns the key of the bundle for a lockfile and the path that the bundle is cached at."""
+    key = file_sha256(lockfile_path)
+    return key, os.path.join(cache_dir, 'platform-packages-{0}.tar.gz'.format(key[:16]))
+
+
+def find_bundle(lockfile_path: str, cache_dir: str) -> PackageBundle:
+    """Returns the previously built package bundle for the given lockfile."""
+    if not os.path.isfile(lockfile_path) or not os.path.isfile(bundle_path(lockfile_path, cache_dir)[1]):
+        raise FileNotFoundError('platform package bundle for {0} not found in {1} - '
+                                'build it by running: python3 package_bundle.py'.format(lockfile_path, cache_dir))
+
+    key, archive_path = bundle_path(lockfile_path, cache_dir)
+    return PackageBundle(path=archive_path, sha256=file_sha256(archive_path), key=key)
+
+
+def docker_run(image: str, script: str, volume: Optional[str] = None) -> str:
+    command = ['docker', 'run', '--rm']
+    if volume:
+        command.extend(['--volume', '{0}:/bundle'.format(volume)])
+    command.extend([image, 'bash', '-c', script])
+    result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+    if result.returncode != 0:
+        raise RuntimeError('docker run failed:\n{0}{1}'.format(result.stdout, result.stderr))
+    return result.stdout
+
+
+def resolve_image_digest(image: str) -> str:
+    subprocess.run(['docker', 'pull', '--quiet', image], stdout=subprocess.DEVNULL, check=True)
+    result = subprocess.run(['docker', 'image', 'inspect', '--format', '{{index .RepoDigests 0}}', image],
+                            stdout=subprocess.PIPE, universal_newlines=True, check=True)
+    return result.stdout.strip()
+
+
+def update_lockfile(package_list_path: str, lockfile_path: str):
+    """Resolves the current versions of the requested packages and writes them to the lockfile."""
+    image = resolve_image_digest(BUNDLE_BASE_IMAGE)
+    packages = read_package_list(package_list_path)
+    output = docker_run(image, RESOLVE_SCRIPT.format(packages=' '.join(packages)))
+    resolved = [line.strip() for line in output.splitlines() if re.match(r'^\S+=\S+$', line.strip())]
+    if not resolved:
+        raise RuntimeError('unable to resolve package versions:\n{0}'.format(output))
+    write_lockfile(lockfile_path, image, resolved)
+
+
+def build_bundle(lockfile_path: str, cache_dir: str) -> PackageBundle:
+    """
+    Returns the package bundle for the given lockfile, building it with Docker if a bundle
+    for the same lockfile doesn't already exist within cache_dir.
+    """
+    key, archive_path = bundle_path(lockfile_path, cache_dir)
+    if os.path.isfile(archive_path):
+        return PackageBundle(path=archive_path, sha256=file_sha256(archive_path), key=key)
+
+    image, packages = read_lockfile(lockfile_path)
+    os.makedirs(cache_dir, exist_ok=True)
+    archive_name = os.path.basename(archive_path)
+
+    # Build into a temporary directory and then move the archive into place, so that an
+    # interrupted build never leaves behind a partial archive that looks like a cache hit.
+    with tempfile.TemporaryDirectory(dir=cache_dir) as build_dir:
+        try:
+            output = docker_run(image,
+                                BUILD_SCRIPT.format(packages=' '.join(packages),
+                                                    archive=archive_name,
+                                                    uid=os.getuid(),
+                                                    gid=os.getgid()),
+                                volume=os.path.abspath(build_dir))
+        except RuntimeError as e:
+            # The Ubuntu archive only lists the current version of updated packages, so
+            # locked versions that have since been superseded can no longer be downloaded.
+            raise RuntimeError('{0}\nIf a locked package version is no longer available, update the '
+                               'lockfile by running: python3 package_bundle.py --update'.format(e))
+
+        # Every package in the bundle must be pinned by the lockfile, otherwise the
+        # bundle's contents would depend on the state of the mirrors at build time.
+        locked = {package.split('=', 1)[0].split(':', 1)[0] + '=' + package.split('=', 1)[1]
+                  for package in packages}
+        downloaded = [line[len('deb: '):].strip() for line in output.splitlines() if line.startswith('deb: ')]
+        unlocked = sorted(set(downloaded) - locked)
+        if not downloaded:
+            raise RuntimeError('no packages downloaded for lockfile: {0}'.format(lockfile_path))
+        if unlocked:
+            raise RuntimeError('downloaded packages not pinned in lockfile {0}: {1}\n'
+                               'Update the lockfile by running: python3 package_bundle.py --update'.format(
+                                   lockfile_path, ', '.join(unlocked)))
+
+        os.replace(os.path.join(build_dir, archive_name), archive_path)
+
+    return PackageBundle(path=archive_path, sha256=file_sha256(archive_path), key=key)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Builds the offline bundle of Controller VM platform packages.')
+    parser.add_argument('--update', action='store_true',
+                        help='resolve the latest package versions and rewrite the lockfile before building')
+    parser.add_argument('--packages', default='platform-packages.list',
+                        help='path to the list of requested packages (default: %(default)s)')
+    parser.add_argument('--lockfile', default='platform-packages.lock',
+                        help='path to the lockfile of pinned package versions (default: %(default)s)')
+    parser.add_argument('--cache-dir', default='package-bundles',
+                        help='directory that bundles are written to (default: %(default)s)')
+    args = parser.parse_args()
+
+    if args.update or not os.path.isfile(args.lockfile):
+        print('Resolving package versions into {0}'.format(args.lockfile))
+        update_lockfile(args.packages, args.lockfile)
+
+    print('Building platform package bundle for {0}'.format(args.lockfile))
+    bundle = build_bundle(args.lockfile, args.cache_dir)
+    print('{0}  {1}'.format(bundle.sha256, bundle.path))
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except Exception as e:
+        print('error: {0}'.format(e), file=sys.stderr)
+        sys.exit(1)
@@ -8,11 +8,14 @@
 # https://github.com/pulumi/examples/blob/master/LICENSE
 
 import abc
+import hashlib
 import json
 import io
 import paramiko
 import pulumi
 from pulumi import dynamic
+import readiness
+import shlex
 import time
 from typing import Any, Optional
 from typing_extensions import TypedDict
@@ -80,6 +83,9 @@ def connect(conn: ConnectionArgs) -> paramiko.SSHClient:
 class ProvisionerProvider(dynamic.ResourceProvider):
     __metaclass__ = abc.ABCMeta
 
+    # Keys that are only set by on_create and are not compared when diffing.
+    output_keys = ()
+
     @abc.abstractmethod
     def on_create(self, inputs: Any) -> Any:
         return
@@ -92,6 +98,8 @@ class ProvisionerProvider(dynamic.ResourceProvider):
         # If anything changed in the inputs, replace the resource.
         diffs = []
         for key in olds:
+            if key in self.output_keys:
+                continue
             if key not in news:
                 diffs.append(key)
             else:
@@ -106,10 +114,74 @@ class ProvisionerProvider(dynamic.ResourceProvider):
         return dynamic.DiffResult(changes=len(diffs) > 0, replaces=diffs, delete_before_replace=True)
 
 
+# Size of the chunks read from the local file when streaming it to the remote host.
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+
+def stream_extract(ssh: paramiko.SSHClient, src: str, dest: str, strip_components: int) -> str:
+    """
+    Streams a local gzipped tar archive over an exec channel into tar on the remote host, so that
+    the archive is extracted into dest as it is transferred without being written to the remote disk.
+    The archive is hashed locally while it is sent and on the remote host as it is received.
+    Returns the SHA-256 digest of the archive.
+    """
+    # tee sends the archive to both tar and (via fd 3) sha256sum, whose output is the
+    # only thing written to stdout.
+    command = 'set -o pipefail; mkdir --parents {dest} && ' \
+              '{{ tee /dev/fd/3 | tar --extract --gunzip --directory={dest} ' \
+              '--strip-components={strip} --file - >&2; }} 3>&1 | sha256sum'.format(
+                  dest=shlex.quote(dest), strip=int(strip_components))
+    digest = hashlib.sha256()
+    send_error = None
+    channel = ssh.get_transport().open_session()
+    try:
+        channel.exec_command('bash -c {0}'.format(shlex.quote(command)))
+        # If the remote tar exits early (for example, because the archive is corrupt), the
+        # channel is closed while sending. The remote error is collected below in that case.
+        try:
+            with open(src, 'rb') as file:
+                for chunk in iter(lambda: file.read(STREAM_CHUNK_SIZE), b''):
+                    digest.update(chunk)
+                    channel.sendall(chunk)
+            channel.shutdown_write()
+        except (OSError, EOFError) as e:
+            send_error = e
+
+        stdout = channel.makefile('r').read().decode('utf-8')
+        stderr = channel.makefile_stderr('r').read().decode('utf-8')
+        exit_status = channel.recv_exit_status()
+    finally:
+        channel.close()
+
+    if exit_status != 0:
+        raise Exception('unable to extract {0} to {1} (exit status {2}): {3}'.format(
+            src, dest, exit_status, stderr))
+    if send_error is not None:
+        raise Exception('unable to stream {0} to {1}: {2}'.format(src, dest, send_error))
+
+    remote_digest = stdout.split(' ', 1)[0].strip()
+    if remote_digest != digest.hexdigest():
+        raise Exception('checksum mismatch extracting {0} to {1}: local {2} != remote {3}'.format(
+            src, dest, digest.hexdigest(), remote_digest))
+
+    return digest.hexdigest()
+
+
 # CopyFileProvider implements the resource lifecycle for the CopyFile resource type below.
 class CopyFileProvider(ProvisionerProvider):
+    output_keys = ('sha256',)
+
     def on_create(self, inputs: Any) -> Any:
         ssh = connect(inputs['conn'])
+        if inputs.get('extract'):
+            try:
+                pulumi.log.debug('stream extract: {0} -> {1}'.format(inputs['src'], inputs['dest']))
+                inputs['sha256'] = stream_extract(ssh, inputs['src'], inputs['dest'],
+                                                  inputs.get('strip_components') or 0)
+            finally:
+                ssh.close()
+            return inputs
+
         scp = ssh.open_sftp()
         try:
             if 'src' in inputs:
@@ -125,10 +197,14 @@ class CopyFileProvider(ProvisionerProvider):
         return inputs
 
 
-# CopyFile is a provisioner step that can copy a file over an SSH connection.
+# CopyFile is a provisioner step that can copy a file over an SSH connection. When extract is set,
+# the file must be a gzipped tar archive and it is streamed into tar on the remote host instead.
 class CopyFile(dynamic.Resource):
+    sha256: pulumi.Output[str]
+
     def __init__(self, name: str, conn: pulumi.Input[ConnectionArgs],
-                 src: str, dest: str, opts: Optional[pulumi.ResourceOptions] = None):
+                 src: str, dest: str, extract: bool = False, strip_components: int = 0,
+                 opts: Optional[pulumi.ResourceOptions] = None):
         self.conn = conn
         """conn contains information on how to connect to the destination, in addition to dependency information."""
         self.src = src
@@ -137,17 +213,35 @@ class CopyFile(dynamic.Resource):
         working directory or as an absolute path. This cannot be specified if content is set.
         """
         self.dest = dest
-        """dest is required and specifies the absolute path on the target where the file will be copied to."""
+        """
+        dest is required and specifies the absolute path on the target where the file will be copied to.
+        If extract is set, it is the directory on the target where the archive will be extracted to.
+        """
+        self.extract = extract
+        """
+        extract streams the file into tar on the target, so that it is extracted while being transferred
+        and the archive itself is never written to the target's disk.
+        """
+        self.strip_components = strip_components
+        """strip_components is the number of leading path components removed from files when extracting."""
+        self.sha256 = None
+        """The SHA-256 digest of the extracted archive (only set if extract is set)."""
+
+        props = {
+            'dep': conn,
+            'conn': conn,
+            'src': src,
+            'dest': dest,
+        }
+        if extract:
+            props['extract'] = True
+            props['strip_components'] = strip_components
+            props['sha256'] = None
 
         super().__init__(
             CopyFileProvider(),
             name,
-            {
-                'dep': conn,
-                'conn': conn,
-                'src': src,
-                'dest': dest,
-            },
+            props,
             opts,
         )
 
@@ -226,3 +320,54 @@ class RemoteExec(dynamic.Resource):
             },
             opts,
         )
+
+
+# ReadinessGateProvider implements the resource lifecycle for the ReadinessGate resource type below.
+class ReadinessGateProvider(ProvisionerProvider):
+    output_keys = ('time_to_ready', 'latency_ms', 'probe_results')
+
+    def on_create(self, inputs: Any) -> Any:
+        report = readiness.wait_until_ready(inputs['probes'],
+                                            timeout=inputs['timeout'],
+                                            success_threshold=inputs['success_threshold'])
+        pulumi.log.info('endpoints ready after {0} seconds'.format(report['time_to_ready']))
+        inputs.update(report)
+        return inputs
+
+
+# ReadinessGate waits for a set of HTTP and TCP endpoints to serve traffic by probing them concurrently,
+# failing if they are not all ready before the timeout. It returns the time it took for the endpoints to
+# become ready and the latency percentiles of the probes.
+class ReadinessGate(dynamic.Resource):
+    time_to_ready: pulumi.Output[float]
+    latency_ms: pulumi.Output[dict]
+    probe_results: pulumi.Output[dict]
+
+    def __init__(self, name: str, probes: pulumi.Input[list], timeout: float = 900, success_threshold: int = 3,
+                 opts: Optional[pulumi.ResourceOptions] = None):
+        self.probes = probes
+        """The endpoints to probe, as described by readiness.ProbeArgs."""
+        self.timeout = timeout
+        """The number of seconds to wait for all endpoints to become ready."""
+        self.success_threshold = success_threshold
+        """The number of consecutive successful attempts needed for an endpoint to be considered ready."""
+        self.time_to_ready = None
+        """The number of seconds it took for all endpoints to become ready."""
+        self.latency_ms = None
+        """The p50, p90, p99 and max latency in milliseconds of successful probe attempts."""
+        self.probe_results = None
+        """The number of attempts, time to ready and latency percentiles of each probe."""
+
+        super().__init__(
+            ReadinessGateProvider(),
+            name,
+            {
+                'probes': probes,
+                'timeout': timeout,
+                'success_threshold': success_threshold,
+                'time_to_ready': None,
+                'latency_ms': None,
+                'probe_results': None,
+            },
+            opts,
+        )
@@ -0,0 +1,236 @@
+import math
+import socket
+import ssl
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+from typing_extensions import TypedDict
+
+
+# ProbeArgs describes a single endpoint checked by the readiness gate. Probes of type 'http'
+# request url, and probes of type 'tcp' open a connection to host and port.
+class ProbeArgs(TypedDict, total=False):
+    name: str
+    """The name that the probe is reported under."""
+    type: str
+    """The type of probe: 'http' or 'tcp'."""
+    url: str
+    """The URL requested by an 'http' probe."""
+    method: str
+    """The HTTP method used by an 'http' probe (default GET)."""
+    body: str
+    """The optional request body sent by an 'http' probe."""
+    headers: Dict[str, str]
+    """The optional request headers sent by an 'http' probe."""
+    expected_status: List[int]
+    """The HTTP status codes that indicate success (default is any status below 500)."""
+    verify_tls: bool
+    """Flag indicating if TLS certificates are verified by an 'http' probe (default true)."""
+    host: str
+    """The host connected to by a 'tcp' probe."""
+    port: int
+    """The port connected to by a 'tcp' probe."""
+    timeout: float
+    """The number of seconds each probe attempt may take (default 10)."""
+
+
+def default_probes(controller_host: str) -> List[ProbeArgs]:
+    """Returns the probes that confirm that a Controller installation is serving traffic."""
+    return [
+        # Any response from the API gateway below 500 shows that the API is up. Requests
+        # without a session are expected to be rejected as unauthorized.
+        {
+            'name': 'controller-api',
+            'type': 'http',
+            'url': 'https://{0}/api/v1/platform/global'.format(controller_host),
+            'expected_status': [200, 401, 403],
+        },
+        # A login attempt for a user that doesn't exist can only be rejected once the user
+        # has been looked up, so this probe fails until the config database is reachable.
+        {
+            'name': 'controller-database',
+            'type': 'http',
+            'url': 'https://{0}/api/v1/platform/login'.format(controller_host),
+            'method': 'POST',
+            'headers': {'Content-Type': 'application/json'},
+            'body': '{"credentials": {"type": "BASIC", "username": "readiness-probe@invalid", '
+                    '"password": "readiness-probe"}}',
+            'expected_status': [400, 401, 403],
+        },
+        {
+            'name': 'controller-agent',
+            'type': 'tcp',
+            'host': controller_host,
+            'port': 8443,
+        },
+    ]
+
+
+def probe_http(probe: ProbeArgs) -> None:
+    """Makes a single HTTP request, raising an exception if the response status isn't expected."""
+    body = probe.get('body')
+    request = urllib.request.Request(url=probe['url'],
+                                     data=body.encode('utf-8') if body is not None else None,
+                                     headers=probe.get('headers') or {},
+                                     method=probe.get('method') or 'GET')
+    context = None
+    if probe['url'].startswith('https') and probe.get('verify_tls') is False:
+        context = ssl.create_default_context()
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+
+    try:
+        with urllib.request.urlopen(request, timeout=probe.get('timeout') or 10, context=context) as response:
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+
+    expected_status = [int(code) for code in probe.get('expected_status') or []]
+    if expected_status and status not in expected_status:
+        raise Exception('unexpected HTTP status {0} (expected {1})'.format(status, expected_status))
+    if not expected_status and status >= 500:
+        raise Exception('unexpected HTTP status {0}'.format(status))
+
+
+def probe_tcp(probe: ProbeArgs) -> None:
+    """Opens and closes a single TCP connection."""
+    with socket.create_connection((probe['host'], int(probe['port'])), timeout=probe.get('timeout') or 10):
+        pass
+
+
+PROBE_TYPES = {
+    'http': probe_http,
+    'tcp': probe_tcp,
+}
+
+# Keys that must be set on a probe of each type.
+PROBE_REQUIRED_KEYS = {
+    'http': ('url',),
+    'tcp': ('host', 'port'),
+}
+
+
+def percentiles(samples: List[float]) -> Dict[str, Optional[float]]:
+    """Returns the nearest-rank p50, p90, p99 and max of the samples, rounded to 0.1 milliseconds."""
+    if not samples:
+        return {'p50': None, 'p90': None, 'p99': None, 'max': None}
+
+    ordered = sorted(samples)
+
+    def rank(percentile: int) -> float:
+        index = max(int(math.ceil(percentile / 100.0 * len(ordered))) - 1, 0)
+        return round(ordered[index], 1)
+
+    return {'p50': rank(50), 'p90': rank(90), 'p99': rank(99), 'max': round(ordered[-1], 1)}
+
+
+def run_probe(probe: ProbeArgs, start: float, deadline: float, success_threshold: int,
+              initial_backoff: float, max_backoff: float) -> Dict[str, Any]:
+    """
+    Repeatedly runs a probe until it succeeds success_threshold times in a row, backing off
+    exponentially after each failure. Gives up once the deadline passes. The probe is reported
+    as ready from the first success of the passing streak, so the time spent confirming
+    readiness is not included.
+    """
+    probe_fn = PROBE_TYPES[probe['type']]
+
+    latencies = []
+    attempts = 0
+    successes = 0
+    streak_start = None
+    backoff = initial_backoff
+    last_error = None
+
+    while True:
+        attempts = attempts + 1
+        attempt_start = time.monotonic()
+        try:
+            probe_fn(probe)
+            attempt_end = time.monotonic()
+            latencies.append((attempt_end - attempt_start) * 1000)
+            if successes == 0:
+                streak_start = attempt_end
+            successes = successes + 1
+            if successes >= success_threshold:
+                return {
+                    'ready': True,
+                    'attempts': attempts,
+                    'ready_after': round(streak_start - start, 3),
+                    'latencies': latencies,
+                    'error': None,
+                }
+            # Successful attempts are repeated quickly until the threshold is met
+            wait = initial_backoff
+            backoff = initial_backoff
+        except Exception as e:
+            successes = 0
+            last_error = str(e) or type(e).__name__
+            wait = backoff
+            backoff = min(backoff * 2, max_backoff)
+
+        wait = min(wait, deadline - time.monotonic())
+        if wait <= 0:
+            break
+        time.sleep(wait)
+
+    return {
+        'ready': False,
+        'attempts': attempts,
+        'ready_after': None,
+        'latencies': latencies,
+        'error': last_error,
+    }
+
+
+def wait_until_ready(probes: List[ProbeArgs], timeout: float, success_threshold: int = 3,
+                     initial_backoff: float = 1, max_backoff: float = 30) -> Dict[str, Any]:
+    """
+    Runs all probes concurrently until each of them succeeds, raising an exception if they are
+    not all ready within timeout seconds. Returns the time to ready in seconds, along with
+    the latency percentiles in milliseconds of the successful probe attempts.
+    """
+    if not probes:
+        raise ValueError('at least one readiness probe must be defined')
+    names = set()
+    for index, probe in enumerate(probes):
+        name = probe.get('name')
+        if not name:
+            raise ValueError('readiness probe {0} (type {1}) has no name'.format(index, probe.get('type')))
+        if name in names:
+            raise ValueError('readiness probe {0} has a duplicate name: {1}'.format(index, name))
+        names.add(name)
+        if probe.get('type') not in PROBE_TYPES:
+            raise ValueError('readiness probe {0} has an unknown type: {1} (expected one of {2})'.format(
+                name, probe.get('type'), ', '.join(sorted(PROBE_TYPES))))
+        missing = [key for key in PROBE_REQUIRED_KEYS[probe['type']] if probe.get(key) in (None, '')]
+        if missing:
+            raise ValueError('readiness probe {0} of type {1} is missing: {2}'.format(
+                name, probe['type'], ', '.join(missing)))
+
+    start = time.monotonic()
+    deadline = start + timeout
+
+    with ThreadPoolExecutor(max_workers=len(probes)) as executor:
+        futures = {probe['name']: executor.submit(run_probe, probe, start, deadline, int(success_threshold),
+                                                  initial_backoff, max_backoff)
+                   for probe in probes}
+        results = {name: future.result() for name, future in futures.items()}
+
+    not_ready = {name: result for name, result in results.items() if not result['ready']}
+    if not_ready:
+        errors = ['{0}: {1} (after {2} attempts)'.format(name, result['error'], result['attempts'])
+                  for name, result in not_ready.items()]
+        raise Exception('endpoints not ready within {0} seconds:\n{1}'.format(timeout, '\n'.join(errors)))
+
+    all_latencies = [latency for result in results.values() for latency in result['latencies']]
+    return {
+        'time_to_ready': round(max(result['ready_after'] for result in results.values()), 3),
+        'latency_ms': percentiles(all_latencies),
+        'probe_results': {name: {
+            'attempts': result['attempts'],
+            'ready_after': result['ready_after'],
+            'latency_ms': percentiles(result['latencies']),
+        } for name, result in results.items()},
+    }
@@ -0,0 +1,125 @@
+import http.server
+import socket
+import threading
+import time
+import unittest
+
+import readiness
+
+
+# StandInHandler stands in for Controller's API. GET requests are answered with the
+# status code set on the server, and POST requests are always rejected as unauthorized.
+class StandInHandler(http.server.BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.send_response(self.server.status)
+        self.end_headers()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        self.send_response(401)
+        self.end_headers()
+
+
+def unused_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class ReadinessTest(unittest.TestCase):
+    def setUp(self):
+        self.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+        self.server.status = 401
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def url(self, path: str) -> str:
+        return 'http://127.0.0.1:{0}{1}'.format(self.port, path)
+
+    def test_ready_on_expected_status(self):
+        probes = readiness.default_probes('127.0.0.1')
+        probes[0]['url'] = self.url('/api/v1/platform/global')
+        probes[1]['url'] = self.url('/api/v1/platform/login')
+        probes[2]['port'] = self.port
+
+        report = readiness.wait_until_ready(probes, timeout=10, initial_backoff=0.05)
+
+        self.assertEqual({'controller-api', 'controller-database', 'controller-agent'},
+                         set(report['probe_results']))
+        for result in report['probe_results'].values():
+            self.assertEqual(3, result['attempts'])
+            self.assertIsNotNone(result['latency_ms']['p50'])
+        self.assertIsNotNone(report['latency_ms']['p99'])
+
+    def test_time_to_ready_excludes_confirmation(self):
+        probes = [{'name': 'api', 'type': 'http', 'url': self.url('/')}]
+
+        report = readiness.wait_until_ready(probes, timeout=10, success_threshold=3, initial_backoff=0.5)
+
+        self.assertLess(report['time_to_ready'], 0.5)
+
+    def test_recovers_after_unexpected_status(self):
+        self.server.status = 503
+        threading.Timer(0.3, lambda: setattr(self.server, 'status', 200)).start()
+        probes = [{'name': 'api', 'type': 'http', 'url': self.url('/'), 'expected_status': [200]}]
+
+        report = readiness.wait_until_ready(probes, timeout=10, initial_backoff=0.05, max_backoff=0.1)
+
+        self.assertGreater(report['probe_results']['api']['attempts'], 3)
+        self.assertGreaterEqual(report['time_to_ready'], 0.3)
+
+    def test_unexpected_status_rejected(self):
+        self.server.status = 503
+        probes = [{'name': 'api', 'type': 'http', 'url': self.url('/'), 'expected_status': [200]}]
+
+        with self.assertRaisesRegex(Exception, r'api: unexpected HTTP status 503 \(expected \[200\]\)'):
+            readiness.wait_until_ready(probes, timeout=0.5, initial_backoff=0.05)
+
+    def test_not_ready_past_deadline(self):
+        probes = [{'name': 'agent', 'type': 'tcp', 'host': '127.0.0.1', 'port': unused_port()}]
+
+        start = time.monotonic()
+        with self.assertRaisesRegex(Exception, r'endpoints not ready within 0.5 seconds:\nagent: '):
+            readiness.wait_until_ready(probes, timeout=0.5, initial_backoff=0.05)
+        self.assertLess(time.monotonic() - start, 5)
+
+    def test_tcp_probe(self):
+        readiness.probe_tcp({'name': 'agent', 'type': 'tcp', 'host': '127.0.0.1', 'port': self.port})
+        with self.assertRaises(OSError):
+            readiness.probe_tcp({'name': 'agent', 'type': 'tcp', 'host': '127.0.0.1', 'port': unused_port()})
+
+    def test_probe_without_name(self):
+        with self.assertRaisesRegex(ValueError, 'readiness probe 1 \\(type tcp\\) has no name'):
+            readiness.wait_until_ready([{'name': 'api', 'type': 'http', 'url': self.url('/')},
+                                        {'type': 'tcp', 'host': '127.0.0.1', 'port': self.port}], timeout=1)
+
+    def test_probes_with_duplicate_names(self):
+        with self.assertRaisesRegex(ValueError, 'readiness probe 1 has a duplicate name: api'):
+            readiness.wait_until_ready([{'name': 'api', 'type': 'http', 'url': self.url('/')},
+                                        {'name': 'api', 'type': 'tcp', 'host': '127.0.0.1', 'port': self.port}],
+                                       timeout=1)
+
+    def test_probe_with_unknown_type(self):
+        start = time.monotonic()
+        with self.assertRaisesRegex(ValueError, 'readiness probe api has an unknown type: htp'):
+            readiness.wait_until_ready([{'name': 'api', 'type': 'htp', 'url': self.url('/')}], timeout=5)
+        self.assertLess(time.monotonic() - start, 1)
+
+    def test_probe_missing_required_keys(self):
+        start = time.monotonic()
+        with self.assertRaisesRegex(ValueError, 'readiness probe api of type http is missing: url'):
+            readiness.wait_until_ready([{'name': 'api', 'type': 'http'}], timeout=5)
+        with self.assertRaisesRegex(ValueError, 'readiness probe agent of type tcp is missing: port'):
+            readiness.wait_until_ready([{'name': 'agent', 'type': 'tcp', 'host': '127.0.0.1'}], timeout=5)
+        self.assertLess(time.monotonic() - start, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -24,13 +24,69 @@ TLS_HOSTNAME=""
 CERTBOT_FLAGS=""
 CERT_DIR="/etc/letsencrypt/live/${TLS_HOSTNAME}"
 LETS_ENCRYPT_EMAIL=""
+# Space-separated packages to install (substituted from the platform package list)
+PLATFORM_PACKAGES=""
+# Flag indicating if packages are installed from the offline package bundle uploaded by
+# the provisioner. The bundle's SHA-256 digest is uploaded to a checksum file once the
+# bundle itself has been uploaded.
+OFFLINE_PACKAGES="false"
+PACKAGE_BUNDLE="/tmp/platform-packages.tar.gz"
+PACKAGE_BUNDLE_SHA256_FILE="/tmp/platform-packages.tar.gz.sha256"
+PACKAGE_BUNDLE_DIR="/var/cache/platform-packages"
+PACKAGE_BUNDLE_SOURCE="/etc/apt/sources.list.d/platform-packages.list"
+
+install_packages_from_bundle() {
+  # The bundle is uploaded over SSH once the VM is reachable, so we wait for it here.
+  # The checksum file is only uploaded after the bundle, and the digest check also
+  # guards against reading a partially uploaded or corrupted archive.
+  for i in {1..40}; do
+    if [ -f "${PACKAGE_BUNDLE_SHA256_FILE}" ] && sha256sum --check --status "${PACKAGE_BUNDLE_SHA256_FILE}"; then
+      break
+    else
+      >&2 echo "Platform package bundle not available sleeping for 15 seconds"
+      sleep 15
+    fi
+  done
+
+  if [ ! -f "${PACKAGE_BUNDLE_SHA256_FILE}" ] || ! sha256sum --check --status "${PACKAGE_BUNDLE_SHA256_FILE}"; then
+    >&2 echo "Platform package bundle not available"
+    return 1
+  fi
+
+  echo "Installing platform packages from ${PACKAGE_BUNDLE}"
+  # errexit is not in effect when this function is used as a condition, so each
+  # step explicitly returns on failure.
+  sudo mkdir --parents "${PACKAGE_BUNDLE_DIR}" || return 1
+  sudo tar --extract --gunzip --directory="${PACKAGE_BUNDLE_DIR}" --file "${PACKAGE_BUNDLE}" || return 1
+  echo "deb [trusted=yes] file:${PACKAGE_BUNDLE_DIR} ./" | sudo tee "${PACKAGE_BUNDLE_SOURCE}" > /dev/null || return 1
+  # Only read from the local repository so that no mirrors are contacted, while
+  # keeping any existing package lists for the mirrors intact.
+  sudo apt-get update -qq \
+    -o Dir::Etc::sourcelist="${PACKAGE_BUNDLE_SOURCE}" \
+    -o Dir::Etc::sourceparts="-" \
+    -o APT::Get::List-Cleanup="0" || return 1
+  sudo apt-get install -qq -y \
+    -o Dir::Etc::sourcelist="${PACKAGE_BUNDLE_SOURCE}" \
+    -o Dir::Etc::sourceparts="-" \
+    ${PLATFORM_PACKAGES} || return 1
+}
+
+cleanup_package_bundle() {
+  sudo rm --force "${PACKAGE_BUNDLE_SOURCE}" "${PACKAGE_BUNDLE}" "${PACKAGE_BUNDLE_SHA256_FILE}"
+  sudo rm --recursive --force "${PACKAGE_BUNDLE_DIR}"
+}
 
 # Install prerequisite dependencies
-sudo apt-get update -qq
-sudo apt-get install -qq -y \
-  apt-transport-https bash ca-certificates certbot conntrack coreutils curl ebtables ethtool gawk gettext \
-  gettext-base grep gzip iproute2 iptables jq less libc-bin mount openssl parted postgresql-client procps \
-  sed socat software-properties-common sudo tar util-linux wait-for-it xfsprogs
+if [ "${OFFLINE_PACKAGES}" == "true" ] && install_packages_from_bundle; then
+  cleanup_package_bundle
+else
+  if [ "${OFFLINE_PACKAGES}" == "true" ]; then
+    >&2 echo "Unable to install from platform package bundle - falling back to package mirrors"
+    cleanup_package_bundle
+  fi
+  sudo apt-get update -qq
+  sudo apt-get install -qq -y ${PLATFORM_PACKAGES}
+fi
 
 if [ "$(swapon --show)" != "" ]; then
   >&2 echo 'swap detected: In order to install NGINX Controller, swap must be disabled.';